@@ -0,0 +1,532 @@
+"""
+Load-testing / regression benchmark for the iWeb Ops backend.
+
+Runs the real backend code (FastAPI routes, the metrics collector and the
+alert daemon) against a simulated Docker daemon, so production-sized hosts
+(10 - 2000 containers) can be reproduced locally without starting anything.
+
+Usage:
+    python bench.py --containers 500 --stats-latency-ms 2 --out bench_report.json
+    python bench.py --scenarios api,collector --db-days 7
+    python bench.py --compare old_report.json new_report.json
+
+The report is plain JSON (commit, config, per-scenario throughput,
+p50/p99 latency and RSS). With the same --seed and config two reports are
+directly comparable across commits.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import docker
+import psutil
+
+MB = 1024 * 1024
+
+
+# --- FAKE DOCKER DAEMON ---
+
+class FakeImage:
+    def __init__(self, tag, image_id):
+        self.tags = [tag] if tag else []
+        self.id = image_id
+
+
+class FakeContainer:
+    """Mimics the subset of docker.models.containers.Container used by the backend."""
+
+    def __init__(self, client, index, rng):
+        self.client = client
+        self.id = "%064x" % rng.getrandbits(256)
+        self.short_id = self.id[:12]
+        self.name = f"bench-{index:04d}"
+        self.image = FakeImage(rng.choice(["nginx:alpine", "redis:alpine", "postgres:16", "", "node:20"]),
+                               "sha256:%064x" % rng.getrandbits(256))
+        self.status = "running" if rng.random() < client.running_ratio else "exited"
+
+        self._cpus = rng.choice([1, 2, 4, 8])
+        self._mem_limit = rng.choice([64, 128, 256, 512, 1024, 2048]) * MB
+        self._mem_usage = int(self._mem_limit * rng.uniform(0.05, 0.97))
+        self._cpu_total = rng.randint(10**9, 10**12)
+        self._system_total = rng.randint(10**13, 10**14)
+        self._rx = rng.randint(0, 10**10)
+        self._tx = rng.randint(0, 10**10)
+        self._blk_read = rng.randint(0, 10**11)
+        self._blk_write = rng.randint(0, 10**11)
+        self._pids = rng.randint(1, 300)
+        self._rng = random.Random(rng.getrandbits(32))
+        self._log_blob = None
+
+    @property
+    def attrs(self):
+        running = self.status == "running"
+        return {
+            "Id": self.id,
+            "Name": "/" + self.name,
+            "State": {"Status": self.status, "Running": running, "Pid": 1000 if running else 0},
+        }
+
+    def stats(self, stream=False, decode=None):
+        self.client.simulate_latency()
+
+        if self.status != "running":
+            # Docker returns an (almost) empty payload for stopped containers
+            return {"read": "0001-01-01T00:00:00Z", "cpu_stats": {"cpu_usage": {"total_usage": 0}},
+                    "precpu_stats": {"cpu_usage": {}}, "memory_stats": {}, "pids_stats": {},
+                    "blkio_stats": {"io_service_bytes_recursive": None}}
+
+        rng = self._rng
+        pre_cpu, pre_sys = self._cpu_total, self._system_total
+        sys_step = 10**9 * self._cpus
+        self._system_total += sys_step
+        self._cpu_total += int(sys_step * rng.uniform(0.0, 0.6))
+        self._mem_usage = max(MB, min(self._mem_limit, self._mem_usage + rng.randint(-4 * MB, 4 * MB)))
+        self._rx += rng.randint(0, 5 * MB)
+        self._tx += rng.randint(0, 5 * MB)
+        self._blk_read += rng.randint(0, 20 * MB)
+        self._blk_write += rng.randint(0, 20 * MB)
+        self._pids = max(1, self._pids + rng.randint(-2, 2))
+
+        cache = int(self._mem_usage * 0.3)
+        per_cpu = [self._cpu_total // self._cpus] * self._cpus
+        return {
+            "read": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "cpu_stats": {
+                "cpu_usage": {"total_usage": self._cpu_total, "percpu_usage": per_cpu},
+                "system_cpu_usage": self._system_total,
+                "online_cpus": self._cpus,
+            },
+            "precpu_stats": {
+                "cpu_usage": {"total_usage": pre_cpu, "percpu_usage": per_cpu},
+                "system_cpu_usage": pre_sys,
+                "online_cpus": self._cpus,
+            },
+            "memory_stats": {
+                "usage": self._mem_usage,
+                "limit": self._mem_limit,
+                "stats": {
+                    "cache": cache,
+                    "rss": self._mem_usage - cache,
+                    "inactive_file": cache // 2,
+                },
+            },
+            "pids_stats": {"current": self._pids, "limit": 4096},
+            "blkio_stats": {
+                "io_service_bytes_recursive": [
+                    {"major": 8, "minor": 0, "op": "read", "value": self._blk_read},
+                    {"major": 8, "minor": 0, "op": "write", "value": self._blk_write},
+                ]
+            },
+            "networks": {
+                "eth0": {"rx_bytes": self._rx, "tx_bytes": self._tx},
+            },
+        }
+
+    def logs(self, tail="all", **kwargs):
+        if self._log_blob is None:
+            line = ("x" * max(0, self.client.log_line_bytes - 1)) + "\n"
+            self._log_blob = [f"{self.name} {i:06d} {line}".encode() for i in range(self.client.log_lines)]
+        lines = self._log_blob if tail == "all" else self._log_blob[-int(tail):]
+        return b"".join(lines)
+
+    def start(self):
+        self.status = "running"
+
+    def stop(self, **kwargs):
+        self.status = "exited"
+
+    def restart(self, **kwargs):
+        self.status = "running"
+
+    def update(self, **kwargs):
+        if "mem_limit" in kwargs:
+            self._mem_limit = int(str(kwargs["mem_limit"]).rstrip("m")) * MB
+        return {"Warnings": []}
+
+
+class FakeContainerCollection:
+    def __init__(self, client):
+        self.client = client
+
+    def list(self, all=False, **kwargs):
+        if all:
+            return list(self.client.container_pool)
+        return [c for c in self.client.container_pool if c.status == "running"]
+
+    def get(self, container_id):
+        for c in self.client.container_pool:
+            if c.name == container_id or c.id.startswith(container_id):
+                return c
+        raise docker.errors.NotFound(f"No such container: {container_id}")
+
+
+class FakeDockerClient:
+    """Drop-in replacement for docker.DockerClient backed by in-memory containers."""
+
+    def __init__(self, containers=100, stats_latency_ms=0.0, log_lines=200, log_line_bytes=120,
+                 running_ratio=0.9, seed=42):
+        self.rng = random.Random(seed)
+        self.stats_latency = stats_latency_ms / 1000.0
+        self.log_lines = log_lines
+        self.log_line_bytes = log_line_bytes
+        self.running_ratio = running_ratio
+        self.container_pool = [FakeContainer(self, i, self.rng) for i in range(containers)]
+        self.containers = FakeContainerCollection(self)
+
+    def simulate_latency(self):
+        if self.stats_latency > 0:
+            # +-25% jitter so p99 is not identical to p50
+            time.sleep(self.stats_latency * self.rng.uniform(0.75, 1.25))
+
+    def ping(self):
+        return True
+
+
+def install_fake_docker(client):
+    """Patch docker.from_env so backend modules imported afterwards use the fake daemon."""
+    docker.from_env = lambda *args, **kwargs: client
+
+
+# --- SYNTHETIC METRICS.DB ---
+
+# Value ranges for known container_metrics columns; any other column gets a
+# generic range based on its declared type.
+COLUMN_RANGES = {
+    "cpu": (0, 100),
+    "ram": (0, 100),
+    "rx": (0, 5000),
+    "tx": (0, 5000),
+    "blk_read": (0, 20000),
+    "blk_write": (0, 20000),
+    "pids": (1, 300),
+    "mem_cache": (0, 512),
+    "mem_rss": (0, 1024),
+    "mem_inactive_file": (0, 256),
+}
+
+
+def generate_metrics_db(path, container_names, days=1.0, interval=60, seed=42):
+    """
+    Fills a metrics.db with `days` worth of history sampled every `interval`
+    seconds for the host and every container in `container_names`.
+
+    The container INSERT is built from the schema main.init_db() creates, so
+    the same generator works on older and newer trees. Every column draws from
+    its own seeded RNG, so columns shared by two schemas get identical data.
+    Returns the number of container rows written.
+    """
+    import main
+
+    main.DB_FILE = path
+    main.init_db()
+
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    columns = [(row[1], (row[2] or "").upper()) for row in c.execute("PRAGMA table_info(container_metrics)")]
+    value_columns = [(col, col_type) for col, col_type in columns if col not in ("ts", "name")]
+    insert_sql = "INSERT INTO container_metrics ({}) VALUES ({})".format(
+        ", ".join(col for col, _ in columns), ", ".join("?" * len(columns)))
+
+    host_rng = random.Random(f"{seed}:host")
+    column_rngs = {col: random.Random(f"{seed}:{col}") for col, _ in value_columns}
+
+    def value(col, col_type):
+        lo, hi = COLUMN_RANGES.get(col, (0, 100))
+        if "INT" in col_type:
+            return column_rngs[col].randint(lo, hi)
+        return column_rngs[col].uniform(lo, hi)
+
+    end = int(time.time())
+    start = end - int(days * 86400)
+    rows = 0
+    for ts in range(start, end, interval):
+        c.execute("INSERT INTO host_metrics VALUES (?, ?, ?, ?)",
+                  (ts, host_rng.uniform(0, 100), host_rng.uniform(20, 95), host_rng.uniform(30, 90)))
+        batch = []
+        for name in container_names:
+            fields = {"ts": ts, "name": name}
+            fields.update((col, value(col, col_type)) for col, col_type in value_columns)
+            batch.append(tuple(fields[col] for col, _ in columns))
+        c.executemany(insert_sql, batch)
+        rows += len(container_names)
+    conn.commit()
+    conn.close()
+    return rows
+
+
+# --- MEASUREMENT HELPERS ---
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Nearest-rank percentile
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+class RssSampler(threading.Thread):
+    """Samples process RSS in the background to record the peak of a scenario."""
+
+    def __init__(self, period=0.05):
+        super().__init__()
+        self.daemon = True
+        self.period = period
+        self.proc = psutil.Process()
+        self.start_rss = self.proc.memory_info().rss
+        self.peak = self.start_rss
+        self.running = True
+
+    def run(self):
+        while self.running:
+            self.peak = max(self.peak, self.proc.memory_info().rss)
+            time.sleep(self.period)
+
+    def stop(self):
+        self.running = False
+        end = self.proc.memory_info().rss
+        self.peak = max(self.peak, end)
+        return {
+            "start": round(self.start_rss / MB, 2),
+            "end": round(end / MB, 2),
+            "peak": round(self.peak / MB, 2),
+        }
+
+
+def summarize(latencies, duration, ops=None, **extra):
+    ops = len(latencies) if ops is None else ops
+    result = {
+        "ops": ops,
+        "duration_s": round(duration, 4),
+        "throughput_ops_s": round(ops / duration, 2) if duration > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "max": round(max(latencies) * 1000, 3) if latencies else 0.0,
+        },
+    }
+    result.update(extra)
+    return result
+
+
+def timed(fn, iterations):
+    latencies = []
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        s = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - s)
+    return latencies, time.perf_counter() - t0
+
+
+# --- SCENARIOS ---
+
+def scenario_api(args, client):
+    import main
+    from fastapi.testclient import TestClient
+
+    http = TestClient(main.app)
+    http.cookies.set(main.COOKIE_NAME, "valid_session_token")
+    sample = client.container_pool[0]
+
+    routes = [
+        "/api/containers",
+        f"/api/containers/{sample.short_id}",
+        "/api/host/stats",
+        "/api/history/host?range=1h",
+        "/api/history/host?range=7d",
+        f"/api/history/container?range=24h&container={sample.name}",
+        f"/api/history/container?range=30d&container={sample.name}",
+    ]
+    per_route = {}
+    all_latencies = []
+    t0 = time.perf_counter()
+    for route in routes:
+        def call():
+            r = http.get(route)
+            if r.status_code != 200:
+                raise RuntimeError(f"{route} -> {r.status_code}")
+        latencies, duration = timed(call, args.api_requests)
+        per_route[route] = summarize(latencies, duration)
+        all_latencies.extend(latencies)
+    return summarize(all_latencies, time.perf_counter() - t0, routes=per_route)
+
+
+def scenario_collector(args, client):
+    import main
+
+    latencies, duration = timed(main._save_metrics_snapshot, args.collector_iterations)
+    containers = len(client.container_pool)
+    return summarize(latencies, duration,
+                     containers_per_s=round(containers * len(latencies) / duration, 2) if duration > 0 else 0.0)
+
+
+def scenario_alerts(args, client):
+    import alerts
+
+    fired = []
+    alerts.send_telegram_alert = fired.append
+    daemon = alerts.AlertDaemon()
+
+    def check():
+        daemon.check_host()
+        daemon.check_containers()
+
+    latencies, duration = timed(check, args.alert_iterations)
+    return summarize(latencies, duration, alerts_fired=len(fired))
+
+
+SCENARIOS = {
+    "api": scenario_api,
+    "collector": scenario_collector,
+    "alerts": scenario_alerts,
+}
+
+
+# --- REPORTING ---
+
+def git_revision():
+    try:
+        rev = subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"],
+                                             text=True, stderr=subprocess.DEVNULL).strip())
+        return {"commit": rev, "dirty": dirty}
+    except Exception:
+        return {"commit": None, "dirty": None}
+
+
+def compare_reports(base_path, new_path):
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    if base.get("config") != new.get("config"):
+        print("⚠️  Reports were produced with different configs, deltas may not be meaningful.")
+
+    def delta(a, b):
+        return f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+
+    print(f"{'scenario':<12} {'metric':<18} {'base':>12} {'new':>12} {'delta':>9}")
+    for name, b in base["scenarios"].items():
+        n = new["scenarios"].get(name)
+        if not n:
+            continue
+        metrics = [
+            ("throughput_ops_s", b["throughput_ops_s"], n["throughput_ops_s"]),
+            ("p50_ms", b["latency_ms"]["p50"], n["latency_ms"]["p50"]),
+            ("p99_ms", b["latency_ms"]["p99"], n["latency_ms"]["p99"]),
+            ("rss_peak_mb", b["rss_mb"]["peak"], n["rss_mb"]["peak"]),
+        ]
+        for metric, a, v in metrics:
+            print(f"{name:<12} {metric:<18} {a:>12} {v:>12} {delta(a, v):>9}")
+
+
+def run(args):
+    client = FakeDockerClient(
+        containers=args.containers,
+        stats_latency_ms=args.stats_latency_ms,
+        log_lines=args.log_lines,
+        log_line_bytes=args.log_line_bytes,
+        running_ratio=args.running_ratio,
+        seed=args.seed,
+    )
+    install_fake_docker(client)
+
+    workdir = None if args.db else tempfile.mkdtemp(prefix="iweb-bench-")
+    try:
+        return _run_scenarios(args, client, args.db or os.path.join(workdir, "metrics.db"))
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run_scenarios(args, client, db_path):
+    print(f"🧪 Simulating {args.containers} containers, metrics.db at {db_path}")
+
+    import main
+    # main.py sets logging to INFO; keep httpx from logging every request inside the timed loop
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    main.DB_FILE = db_path
+    if args.db:
+        # Same as app startup: make sure the schema (and any migrations) are in place
+        main.init_db()
+    else:
+        names = [c.name for c in client.container_pool[:args.db_containers]]
+        t0 = time.perf_counter()
+        rows = generate_metrics_db(db_path, names, days=args.db_days, interval=args.db_interval, seed=args.seed)
+        print(f"   Generated {rows} container rows in {time.perf_counter() - t0:.1f}s")
+
+    report = {
+        "meta": {
+            **git_revision(),
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "db")},
+        "scenarios": {},
+    }
+
+    for name in args.scenarios.split(","):
+        name = name.strip()
+        if name not in SCENARIOS:
+            print(f"Unknown scenario '{name}', skipping.")
+            continue
+        print(f"▶️  {name}...")
+        sampler = RssSampler()
+        sampler.start()
+        result = SCENARIOS[name](args, client)
+        result["rss_mb"] = sampler.stop()
+        report["scenarios"][name] = result
+        print(f"   {result['throughput_ops_s']} ops/s, p50 {result['latency_ms']['p50']} ms, "
+              f"p99 {result['latency_ms']['p99']} ms, peak RSS {result['rss_mb']['peak']} MB")
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report written to {args.out}")
+    return report
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="iWeb Ops backend benchmark against a simulated Docker daemon")
+    p.add_argument("--containers", type=int, default=100, help="simulated containers (10-2000)")
+    p.add_argument("--stats-latency-ms", type=float, default=1.0, help="latency of each stats() call")
+    p.add_argument("--log-lines", type=int, default=200, help="log lines kept per container")
+    p.add_argument("--log-line-bytes", type=int, default=120, help="size of each log line")
+    p.add_argument("--running-ratio", type=float, default=0.9, help="fraction of running containers")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--db", help="use an existing metrics.db instead of generating one")
+    p.add_argument("--db-days", type=float, default=1.0, help="days of synthetic history")
+    p.add_argument("--db-interval", type=int, default=60, help="seconds between synthetic samples")
+    p.add_argument("--db-containers", type=int, default=50, help="containers with synthetic history")
+    p.add_argument("--scenarios", default="api,collector,alerts")
+    p.add_argument("--api-requests", type=int, default=20, help="requests per API route")
+    p.add_argument("--collector-iterations", type=int, default=3)
+    p.add_argument("--alert-iterations", type=int, default=3)
+    p.add_argument("--out", default="bench_report.json")
+    p.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two reports and exit")
+    args = p.parse_args(argv)
+    if not args.compare and not 10 <= args.containers <= 2000:
+        p.error("--containers must be between 10 and 2000")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.compare:
+        compare_reports(*args.compare)
+        sys.exit(0)
+    run(args)
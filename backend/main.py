@@ -71,6 +71,17 @@ class ContainerUpdate(BaseModel):
 # Configuración de base de datos
 DB_FILE = "metrics.db"
 
+# Columnas agregadas a container_metrics despues de la version inicial
+# (bloques de disco y memoria en MB, pids como entero)
+CONTAINER_EXTRA_COLUMNS = [
+    ("blk_read", "REAL"),
+    ("blk_write", "REAL"),
+    ("pids", "INTEGER"),
+    ("mem_cache", "REAL"),
+    ("mem_rss", "REAL"),
+    ("mem_inactive_file", "REAL"),
+]
+
 def init_db():
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
@@ -80,9 +91,48 @@ def init_db():
     # Tabla Contenedores
     c.execute('''CREATE TABLE IF NOT EXISTS container_metrics 
                  (ts INTEGER, name TEXT, cpu REAL, ram REAL, rx REAL, tx REAL)''')
+    # Migracion: las bases existentes crecen por columnas, no por filas nuevas
+    existing = {row[1] for row in c.execute("PRAGMA table_info(container_metrics)")}
+    for col, col_type in CONTAINER_EXTRA_COLUMNS:
+        if col not in existing:
+            c.execute(f"ALTER TABLE container_metrics ADD COLUMN {col} {col_type}")
+    # Indice para las consultas de historial por contenedor
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_container_metrics_name_ts 
+                 ON container_metrics (name, ts)''')
     conn.commit()
     conn.close()
 
+class ContainerSample:
+    """Una fila de container_metrics (MB para red, disco y memoria)."""
+    __slots__ = ("ts", "name", "cpu", "ram", "rx", "tx",
+                 "blk_read", "blk_write", "pids", "mem_cache", "mem_rss", "mem_inactive_file")
+
+    COLUMNS = __slots__
+
+    def __init__(self, ts: int, name: str, cpu: float = 0.0, ram: float = 0.0, rx: float = 0.0, tx: float = 0.0,
+                 blk_read: float = 0.0, blk_write: float = 0.0, pids: int = 0,
+                 mem_cache: float = 0.0, mem_rss: float = 0.0, mem_inactive_file: float = 0.0):
+        self.ts = ts
+        self.name = name
+        self.cpu = cpu
+        self.ram = ram
+        self.rx = rx
+        self.tx = tx
+        self.blk_read = blk_read
+        self.blk_write = blk_write
+        self.pids = pids
+        self.mem_cache = mem_cache
+        self.mem_rss = mem_rss
+        self.mem_inactive_file = mem_inactive_file
+
+    def as_row(self) -> tuple:
+        return (self.ts, self.name, self.cpu, self.ram, self.rx, self.tx,
+                self.blk_read, self.blk_write, self.pids,
+                self.mem_cache, self.mem_rss, self.mem_inactive_file)
+
+CONTAINER_INSERT_SQL = "INSERT INTO container_metrics ({}) VALUES ({})".format(
+    ", ".join(ContainerSample.COLUMNS), ", ".join("?" * len(ContainerSample.COLUMNS)))
+
 # --- INICIO BLOQUE DE FUNCIONES DOCKER ---
 
 def _container_mem_pct(stat: Dict[str, Any]) -> float:
@@ -109,7 +159,28 @@ def _container_cpu_pct(stat: Dict[str, Any]) -> float:
     online_cpus = cpu.get("online_cpus") or len(cpu.get("cpu_usage", {}).get("percpu_usage") or []) or 1
     return (cpu_delta / sys_delta) * online_cpus * 100.0
 
-def _get_containers_snapshot():
+def _container_blkio_bytes(stat: Dict[str, Any]) -> tuple:
+    # Suma lectura/escritura de todos los dispositivos ("Read" en cgroup v1, "read" en v2)
+    entries = stat.get("blkio_stats", {}).get("io_service_bytes_recursive") or []
+    read = write = 0
+    for e in entries:
+        op = (e.get("op") or "").lower()
+        if op == "read":
+            read += e.get("value", 0)
+        elif op == "write":
+            write += e.get("value", 0)
+    return read, write
+
+def _container_mem_breakdown(stat: Dict[str, Any]) -> tuple:
+    # cache / rss / inactive_file (cgroup v2 los reporta como file / anon)
+    mem = stat.get("memory_stats", {}).get("stats") or {}
+    cache = mem.get("cache", mem.get("file", 0))
+    rss = mem.get("rss", mem.get("anon", 0))
+    inactive = mem.get("inactive_file", mem.get("total_inactive_file", 0))
+    return cache, rss, inactive
+
+def _collect_container_samples(ts: int) -> list:
+    """Una ContainerSample por contenedor a partir de un snapshot de stats"""
     out = []
     # DOCKER debe estar definido arriba como: DOCKER = docker.from_env()
     try:
@@ -118,49 +189,39 @@ def _get_containers_snapshot():
         print(f"Error conectando con Docker: {e}")
         return []
 
+    mb = 1024 * 1024
     for c in container_list:
-        # Info básica
-        info = {
-            "id": c.id[:12], 
-            "name": c.name, 
-            "status": c.status, 
-            "image": (c.image.tags[0] if c.image.tags else "untagged")
-        }
-        
+        sample = ContainerSample(ts, c.name)
         try:
             # Stats snapshot (stream=False es vital para que no se quede colgado)
             stat = c.stats(stream=False)
-            
-            info["cpu_pct"] = round(_container_cpu_pct(stat), 2)
-            info["mem_pct"] = round(_container_mem_pct(stat), 2)
 
-            mem_usage = stat.get("memory_stats", {}).get("usage", 0)
-            mem_limit = stat.get("memory_stats", {}).get("limit", 0)
-            
-            # Convertimos Bytes a MB
-            info["mem_usage_mb"] = round(mem_usage / (1024 * 1024), 1)
-            info["mem_limit_mb"] = round(mem_limit / (1024 * 1024), 1) if mem_limit else 0
+            sample.cpu = round(_container_cpu_pct(stat), 2)
+            sample.ram = round(_container_mem_pct(stat), 2)
 
             # Red (Suma de todas las interfaces)
             net = stat.get("networks", {}) or {}
-            rx = sum(v.get("rx_bytes", 0) for v in net.values())
-            tx = sum(v.get("tx_bytes", 0) for v in net.values())
-            
-            info["rx_mb"] = round(rx / (1024 * 1024), 2)
-            info["tx_mb"] = round(tx / (1024 * 1024), 2)
-            
+            sample.rx = round(sum(v.get("rx_bytes", 0) for v in net.values()) / mb, 2)
+            sample.tx = round(sum(v.get("tx_bytes", 0) for v in net.values()) / mb, 2)
+
+            # Disco
+            blk_read, blk_write = _container_blkio_bytes(stat)
+            sample.blk_read = round(blk_read / mb, 2)
+            sample.blk_write = round(blk_write / mb, 2)
+
+            # Procesos
+            sample.pids = int(stat.get("pids_stats", {}).get("current") or 0)
+
+            # Desglose de memoria
+            cache, rss, inactive = _container_mem_breakdown(stat)
+            sample.mem_cache = round(cache / mb, 2)
+            sample.mem_rss = round(rss / mb, 2)
+            sample.mem_inactive_file = round(inactive / mb, 2)
         except Exception:
-            # Si el contenedor está apagado o falla stats, rellenamos con 0
-            info.update({
-                "cpu_pct": 0.0, "mem_pct": 0.0, 
-                "mem_usage_mb": 0.0, "mem_limit_mb": 0.0, 
-                "rx_mb": 0.0, "tx_mb": 0.0
-            })
-
-        out.append(info)
-    
-    # Ordenamos: los que más RAM consumen primero
-    out.sort(key=lambda x: x.get("mem_usage_mb", 0), reverse=True)
+            # Si el contenedor está apagado o falla stats, queda todo en 0
+            pass
+
+        out.append(sample)
     return out
 
 # --- FIN BLOQUE DE FUNCIONES ---
@@ -184,11 +245,8 @@ def _save_metrics_snapshot():
               (ts, host_cpu, host_mem.percent, disk.percent))
     
     # 2. Container Stats
-    containers = _get_containers_snapshot() # Tu función existente
-    for cont in containers:
-        c.execute("INSERT INTO container_metrics VALUES (?, ?, ?, ?, ?, ?)",
-                  (ts, cont['name'], cont.get('cpu_pct', 0), cont.get('mem_pct', 0), 
-                   cont.get('rx_mb', 0), cont.get('tx_mb', 0)))
+    samples = _collect_container_samples(ts)
+    c.executemany(CONTAINER_INSERT_SQL, (s.as_row() for s in samples))
     
     conn.commit()
     conn.close()
@@ -274,7 +332,13 @@ def get_history(metric_type: str, range: str = "1h", container: Optional[str] =
             avg(cpu) as cpu, 
             avg(ram) as ram,
             avg(rx) as rx,
-            avg(tx) as tx
+            avg(tx) as tx,
+            avg(blk_read) as blk_read,
+            avg(blk_write) as blk_write,
+            avg(pids) as pids,
+            avg(mem_cache) as mem_cache,
+            avg(mem_rss) as mem_rss,
+            avg(mem_inactive_file) as mem_inactive_file
         FROM container_metrics 
         WHERE ts > ? AND name = ?
         {group_by} 
@@ -282,7 +346,10 @@ def get_history(metric_type: str, range: str = "1h", container: Optional[str] =
         """
         c.execute(query, (start_ts, container))
         rows = c.fetchall()
-        data = [{"ts": r["timestamp"], "cpu": r["cpu"], "ram": r["ram"], "rx": r["rx"], "tx": r["tx"]} for r in rows]
+        data = [{"ts": r["timestamp"], "cpu": r["cpu"], "ram": r["ram"], "rx": r["rx"], "tx": r["tx"],
+                 "blk_read": r["blk_read"], "blk_write": r["blk_write"], "pids": r["pids"],
+                 "mem_cache": r["mem_cache"], "mem_rss": r["mem_rss"], "mem_inactive_file": r["mem_inactive_file"]}
+                for r in rows]
 
     conn.close()
     return data